@@ -3,45 +3,40 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import dataclasses
 import heapq
+import itertools
+import math
+import os
 import pathlib
-import re
-from typing import Any, Literal
+from typing import Any, Literal, NamedTuple
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+
+class Rect(NamedTuple):
+    """Axis-aligned box; derived edges are stored as fields, see Rect.of()."""
 
-@dataclasses.dataclass(frozen=True)
-class Rect:
     x: float
     y: float
     w: float
     h: float
+    left: float
+    top: float
+    right: float
+    bottom: float
+    cx: float
+    cy: float
 
-    @property
-    def cx(self) -> float:
-        return self.x + self.w / 2
-
-    @property
-    def cy(self) -> float:
-        return self.y + self.h / 2
-
-    @property
-    def left(self) -> float:
-        return self.x
-
-    @property
-    def right(self) -> float:
-        return self.x + self.w
-
-    @property
-    def top(self) -> float:
-        return self.y
-
-    @property
-    def bottom(self) -> float:
-        return self.y + self.h
+    @classmethod
+    def of(cls, x: float, y: float, w: float, h: float) -> Rect:
+        return cls(x, y, w, h, x, y, x + w, y + h, x + w / 2, y + h / 2)
 
 
 Side = Literal["left", "right", "top", "bottom"]
@@ -51,76 +46,113 @@ def _round_svg(v: float) -> int:
     return int(round(v))
 
 
-def _anchor(rect: Rect, side: Side) -> tuple[float, float]:
+def _anchor(rect: Rect, side: Side) -> tuple[int, int]:
+    # Snapped to SVG pixels here so every later step works on integers. The
+    # border coordinate snaps outward like the table's own grid lines in
+    # _route_context, so the anchor sits exactly on its edge line.
     if side == "left":
-        return (rect.left, rect.cy)
+        return (math.floor(rect.left), _round_svg(rect.cy))
     if side == "right":
-        return (rect.right, rect.cy)
+        return (math.ceil(rect.right), _round_svg(rect.cy))
     if side == "top":
-        return (rect.cx, rect.top)
+        return (_round_svg(rect.cx), math.floor(rect.top))
     if side == "bottom":
-        return (rect.cx, rect.bottom)
+        return (_round_svg(rect.cx), math.ceil(rect.bottom))
     raise ValueError(f"unknown side: {side}")
 
 
+# Indexed by 2 * (vertical axis) + (moving towards negative coordinates).
+_SIDE_PAIRS: tuple[tuple[Side, Side], ...] = (
+    ("right", "left"),
+    ("left", "right"),
+    ("bottom", "top"),
+    ("top", "bottom"),
+)
+
+
 def _pick_sides(src: Rect, dst: Rect) -> tuple[Side, Side]:
     dx = dst.cx - src.cx
     dy = dst.cy - src.cy
-    if abs(dx) >= abs(dy):
-        return ("right", "left") if dx >= 0 else ("left", "right")
-    return ("bottom", "top") if dy >= 0 else ("top", "bottom")
+    vertical = abs(dy) > abs(dx)
+    return _SIDE_PAIRS[2 * vertical + ((dx, dy)[vertical] < 0)]
 
 
-def _orthogonal_path(
+def _path_d(points: list[tuple[int, int]]) -> str:
+    (x0, y0), *rest = points
+    d_parts: list[str] = ["M%d %d" % (x0, y0)]
+    d_parts.extend(["L%d %d" % (x, y) for x, y in rest])
+    return " ".join(d_parts)
+
+
+def _orthogonal_points(
     src: Rect,
     dst: Rect,
     margin: float = 14.0,
-) -> str:
+) -> list[tuple[int, int]]:
     src_side, dst_side = _pick_sides(src, dst)
     sx, sy = _anchor(src, src_side)
     ex, ey = _anchor(dst, dst_side)
 
-    points: list[tuple[float, float]] = [(sx, sy)]
+    points: list[tuple[int, int]] = [(sx, sy)]
 
     if src_side in ("left", "right") and dst_side in ("left", "right"):
-        if _round_svg(sy) == _round_svg(ey):
+        if sy == ey:
             points.append((ex, ey))
         else:
             if dst_side == "left":
-                mid_x = min(ex - margin, (sx + ex) / 2)
+                mid_x = _round_svg(min(ex - margin, (sx + ex) / 2))
             else:
-                mid_x = max(ex + margin, (sx + ex) / 2)
+                mid_x = _round_svg(max(ex + margin, (sx + ex) / 2))
             points.extend([(mid_x, sy), (mid_x, ey), (ex, ey)])
     elif src_side in ("top", "bottom") and dst_side in ("top", "bottom"):
-        if _round_svg(sx) == _round_svg(ex):
+        if sx == ex:
             points.append((ex, ey))
         else:
             if dst_side == "top":
-                mid_y = min(ey - margin, (sy + ey) / 2)
+                mid_y = _round_svg(min(ey - margin, (sy + ey) / 2))
             else:
-                mid_y = max(ey + margin, (sy + ey) / 2)
+                mid_y = _round_svg(max(ey + margin, (sy + ey) / 2))
             points.extend([(sx, mid_y), (ex, mid_y), (ex, ey)])
     else:
         if src_side in ("left", "right"):
             points.extend([(ex, sy), (ex, ey)])
         else:
             points.extend([(sx, ey), (ex, ey)])
+    return points
 
-    d_parts: list[str] = [f"M{_round_svg(points[0][0])} {_round_svg(points[0][1])}"]
-    for x, y in points[1:]:
-        d_parts.append(f"L{_round_svg(x)} {_round_svg(y)}")
-    return " ".join(d_parts)
+
+def _orthogonal_path(
+    src: Rect,
+    dst: Rect,
+    margin: float = 14.0,
+) -> str:
+    return _path_d(_orthogonal_points(src, dst, margin=margin))
 
 
 def _expand(rect: Rect, pad: float) -> Rect:
-    return Rect(rect.x - pad, rect.y - pad, rect.w + pad * 2, rect.h + pad * 2)
+    return Rect.of(rect.x - pad, rect.y - pad, rect.w + pad * 2, rect.h + pad * 2)
+
+
+# Obstacles as parallel (lefts, rights, tops, bottoms) lists, so inner loops
+# read plain floats instead of going through Rect properties.
+ObstacleSoA = tuple[list[float], list[float], list[float], list[float]]
+
+
+def _obstacle_soa(obstacles: list[Rect]) -> ObstacleSoA:
+    return (
+        [r.left for r in obstacles],
+        [r.right for r in obstacles],
+        [r.top for r in obstacles],
+        [r.bottom for r in obstacles],
+    )
 
 
 def _segment_clear(
-    a: tuple[float, float],
-    b: tuple[float, float],
-    obstacles: list[Rect],
+    a: tuple[int, int],
+    b: tuple[int, int],
+    obstacles: ObstacleSoA,
 ) -> bool:
+    lefts, rights, tops, bottoms = obstacles
     x1, y1 = a
     x2, y2 = b
     if x1 != x2 and y1 != y2:
@@ -128,164 +160,390 @@ def _segment_clear(
     if x1 == x2:
         x = x1
         y_lo, y_hi = (y1, y2) if y1 <= y2 else (y2, y1)
-        for r in obstacles:
-            if not (r.left < x < r.right):
+        for left, right, top, bottom in zip(lefts, rights, tops, bottoms):
+            if not (left < x < right):
                 continue
             # Strict overlap so running along border is allowed.
-            if max(y_lo, r.top) < min(y_hi, r.bottom):
+            if max(y_lo, top) < min(y_hi, bottom):
                 return False
         return True
     y = y1
     x_lo, x_hi = (x1, x2) if x1 <= x2 else (x2, x1)
-    for r in obstacles:
-        if not (r.top < y < r.bottom):
+    for left, right, top, bottom in zip(lefts, rights, tops, bottoms):
+        if not (top < y < bottom):
             continue
-        if max(x_lo, r.left) < min(x_hi, r.right):
+        if max(x_lo, left) < min(x_hi, right):
             return False
     return True
 
 
-def _manhattan(a: tuple[float, float], b: tuple[float, float]) -> float:
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-
 def _a_star(
-    start: tuple[float, float],
-    goal: tuple[float, float],
-    nodes: list[tuple[float, float]],
-    edges: dict[tuple[float, float], list[tuple[float, float]]],
-) -> list[tuple[float, float]] | None:
-    open_heap: list[tuple[float, tuple[float, float]]] = []
-    heapq.heappush(open_heap, (_manhattan(start, goal), start))
-    came_from: dict[tuple[float, float], tuple[float, float]] = {}
-    g_score: dict[tuple[float, float], float] = {start: 0.0}
-    in_open: set[tuple[float, float]] = {start}
+    start: int,
+    goal: int,
+    xs: list[int],
+    ys: list[int],
+    edges_offsets: list[int],
+    edges_flat: list[int],
+    edges_cost: list[int],
+    start_vertical: bool,
+    goal_vertical: bool,
+) -> tuple[list[int], int] | None:
+    """Search the CSR grid graph; returns (came_from, goal state) or None.
+
+    Neighbours of node n are edges_flat[edges_offsets[n]:edges_offsets[n + 1]],
+    with the matching segment lengths in edges_cost. Search states are
+    node * 2 + (arrived moving vertically); came_from maps states to states
+    (-1 for no parent). Among shortest routes the one with fewest bends wins;
+    leaving start or entering goal along the table border instead of straight
+    out of the anchor counts as two bends.
+    """
+    # Node ids index the xs x ys grid as iy * len(xs) + ix.
+    nx = len(xs)
+    gx = xs[goal % nx]
+    gy = ys[goal // nx]
+    n_nodes = len(edges_offsets) - 1
+    # Cost is length * scale + bends; a route never has scale bends, so
+    # length always dominates and bends only break ties.
+    scale = 2 * n_nodes + 2
+
+    # Lazy deletion: states may be pushed several times; stale entries are
+    # skipped on pop by comparing their g against the best known g.
+    tie = itertools.count()
+    open_heap: list[tuple[int, int, int, int]] = []
+    start_state = start * 2 + start_vertical
+    start_h = (abs(xs[start % nx] - gx) + abs(ys[start // nx] - gy)) * scale
+    heapq.heappush(open_heap, (start_h, next(tie), 0, start_state))
+    came_from: list[int] = [-1] * (2 * n_nodes)
+    # Unvisited states sit at +inf; every real g is an int.
+    g_score: list[float] = [float("inf")] * (2 * n_nodes)
+    g_score[start_state] = 0
 
     while open_heap:
-        _, current = heapq.heappop(open_heap)
-        in_open.discard(current)
+        _, _, popped_g, state = heapq.heappop(open_heap)
+        if g_score[state] < popped_g:
+            continue
+        current = state >> 1
         if current == goal:
-            path = [current]
-            while current in came_from:
-                current = came_from[current]
-                path.append(current)
-            path.reverse()
-            return path
-
-        for nxt in edges.get(current, []):
-            tentative = g_score[current] + _manhattan(current, nxt)
-            if tentative < g_score.get(nxt, float("inf")):
-                came_from[nxt] = current
-                g_score[nxt] = tentative
-                if nxt not in in_open:
-                    heapq.heappush(open_heap, (tentative + _manhattan(nxt, goal), nxt))
-                    in_open.add(nxt)
+            return came_from, state
+
+        vertical = state & 1
+        column = current % nx
+        for e in range(edges_offsets[current], edges_offsets[current + 1]):
+            nxt = edges_flat[e]
+            nxt_vertical = nxt % nx == column
+            tentative = popped_g + edges_cost[e] * scale
+            if nxt_vertical != vertical:
+                tentative += 2 if state == start_state else 1
+            if nxt == goal and nxt_vertical != goal_vertical:
+                tentative += 2
+            nxt_state = nxt * 2 + nxt_vertical
+            if tentative < g_score[nxt_state]:
+                came_from[nxt_state] = state
+                g_score[nxt_state] = tentative
+                h = (abs(xs[nxt % nx] - gx) + abs(ys[nxt // nx] - gy)) * scale
+                heapq.heappush(open_heap, (tentative + h, next(tie), tentative, nxt_state))
     return None
 
 
-def _compress_collinear(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
-    if len(points) <= 2:
-        return points
-    out = [points[0]]
-    for i in range(1, len(points) - 1):
-        x0, y0 = out[-1]
-        x1, y1 = points[i]
-        x2, y2 = points[i + 1]
-        if (x0 == x1 == x2) or (y0 == y1 == y2):
-            continue
-        out.append((x1, y1))
-    out.append(points[-1])
-    return out
+@dataclasses.dataclass(frozen=True)
+class RouteContext:
+    """Obstacle data shared by every relation routed over the same tables."""
+
+    ids: list[str]
+    obstacles: ObstacleSoA
+    line_xs: list[tuple[int, ...]]
+    line_ys: list[tuple[int, ...]]
+    table_xs: list[tuple[int, int]]
+    table_ys: list[tuple[int, int]]
+    margin: float
+
+
+def _route_context(
+    all_table_rects: dict[str, Rect],
+    pad: float = 8.0,
+    margin: float = 14.0,
+) -> RouteContext:
+    ids = list(all_table_rects)
+    # Expand obstacles slightly so we don't graze through boxes.
+    expanded = [_expand(all_table_rects[tid], pad) for tid in ids]
+
+    # Candidate grid lines per table: obstacle edges +/- margin, plus the raw
+    # table edges so we can route between columns/rows cleanly. Lines are
+    # snapped to SVG pixels so near-duplicates collapse into one grid line.
+    # Snapping is outward (floor on the left/top, ceil on the right/bottom)
+    # so a line on an obstacle edge never ends up strictly inside it.
+    line_xs: list[tuple[int, ...]] = []
+    line_ys: list[tuple[int, ...]] = []
+    for r in expanded:
+        line_xs.append(
+            (
+                math.floor(r.left - margin),
+                math.floor(r.left),
+                math.ceil(r.right),
+                math.ceil(r.right + margin),
+            )
+        )
+        line_ys.append(
+            (
+                math.floor(r.top - margin),
+                math.floor(r.top),
+                math.ceil(r.bottom),
+                math.ceil(r.bottom + margin),
+            )
+        )
+    table_xs: list[tuple[int, int]] = []
+    table_ys: list[tuple[int, int]] = []
+    for tid in ids:
+        t = all_table_rects[tid]
+        table_xs.append((math.floor(t.left), math.ceil(t.right)))
+        table_ys.append((math.floor(t.top), math.ceil(t.bottom)))
+
+    return RouteContext(
+        ids=ids,
+        obstacles=_obstacle_soa(expanded),
+        line_xs=line_xs,
+        line_ys=line_ys,
+        table_xs=table_xs,
+        table_ys=table_ys,
+        margin=margin,
+    )
+
+
+def _grid_route(
+    start: tuple[int, int],
+    goal: tuple[int, int],
+    xs_list: list[int],
+    ys_list: list[int],
+    obstacles: ObstacleSoA,
+    start_vertical: bool = False,
+    goal_vertical: bool = False,
+) -> list[tuple[int, int]] | None:
+    # Only obstacles reaching into the grid's extent can block a node or edge.
+    x_min, x_max = xs_list[0], xs_list[-1]
+    y_min, y_max = ys_list[0], ys_list[-1]
+    lefts: list[float] = []
+    rights: list[float] = []
+    tops: list[float] = []
+    bottoms: list[float] = []
+    for left, right, top, bottom in zip(*obstacles):
+        if left < x_max and x_min < right and top < y_max and y_min < bottom:
+            lefts.append(left)
+            rights.append(right)
+            tops.append(top)
+            bottoms.append(bottom)
+
+    # Integer node ids over the xs x ys grid; flat lists replace tuple-keyed dicts.
+    nx = len(xs_list)
+    ny = len(ys_list)
+    x_index = {x: i for i, x in enumerate(xs_list)}
+    y_index = {y: i for i, y in enumerate(ys_list)}
+    start_id = y_index[start[1]] * nx + x_index[start[0]]
+    goal_id = y_index[goal[1]] * nx + x_index[goal[0]]
+
+    # Bit k of col_masks[ix] / row_masks[iy] is set when that grid line passes
+    # strictly inside obstacle k, so a node is blocked iff the masks intersect.
+    # gap_x_masks[ix] / gap_y_masks[iy] mark obstacles overlapping the open span
+    # between line i and i+1; OR-ing the spans a segment covers tells which
+    # obstacles it would cross.
+    col_masks = [0] * nx
+    row_masks = [0] * ny
+    gap_x_masks = [0] * nx
+    gap_y_masks = [0] * ny
+    for k in range(len(lefts)):
+        bit = 1 << k
+        left = lefts[k]
+        right = rights[k]
+        for ix, x in enumerate(xs_list):
+            if left < x < right:
+                col_masks[ix] |= bit
+        for ix, (x0, x1) in enumerate(zip(xs_list, xs_list[1:])):
+            if x0 < right and left < x1:
+                gap_x_masks[ix] |= bit
+        top = tops[k]
+        bottom = bottoms[k]
+        for iy, y in enumerate(ys_list):
+            if top < y < bottom:
+                row_masks[iy] |= bit
+        for iy, (y0, y1) in enumerate(zip(ys_list, ys_list[1:])):
+            if y0 < bottom and top < y1:
+                gap_y_masks[iy] |= bit
+
+    present: list[bool] = [False] * (nx * ny)
+    for iy, row_mask in enumerate(row_masks):
+        row = iy * nx
+        for ix, col_mask in enumerate(col_masks):
+            if not (col_mask & row_mask):
+                present[row + ix] = True
+    present[start_id] = True
+    present[goal_id] = True
+
+    # Build adjacency via nearest neighbors along x/y (visibility graph on grid).
+    # Sweep each column and row once, linking consecutive present nodes whose
+    # connecting segment is clear, then emit the CSR arrays in node order.
+    nbr_up: list[int] = [-1] * (nx * ny)
+    nbr_down: list[int] = [-1] * (nx * ny)
+    nbr_left: list[int] = [-1] * (nx * ny)
+    nbr_right: list[int] = [-1] * (nx * ny)
+
+    for ix, col_mask in enumerate(col_masks):
+        prev = -1
+        crossed = 0
+        for iy in range(ny):
+            n = iy * nx + ix
+            if present[n]:
+                # Strict overlap so running along border is allowed.
+                if prev != -1 and not (col_mask & crossed):
+                    nbr_down[prev] = n
+                    nbr_up[n] = prev
+                prev = n
+                crossed = 0
+            crossed |= gap_y_masks[iy]
+
+    for iy, row_mask in enumerate(row_masks):
+        prev = -1
+        crossed = 0
+        row = iy * nx
+        for ix in range(nx):
+            n = row + ix
+            if present[n]:
+                if prev != -1 and not (row_mask & crossed):
+                    nbr_right[prev] = n
+                    nbr_left[n] = prev
+                prev = n
+                crossed = 0
+            crossed |= gap_x_masks[ix]
+
+    edges_offsets: list[int] = [0]
+    edges_flat: list[int] = []
+    edges_cost: list[int] = []
+    for n in range(nx * ny):
+        x = xs_list[n % nx]
+        y = ys_list[n // nx]
+        m = nbr_up[n]
+        if m != -1:
+            edges_flat.append(m)
+            edges_cost.append(y - ys_list[m // nx])
+        m = nbr_down[n]
+        if m != -1:
+            edges_flat.append(m)
+            edges_cost.append(ys_list[m // nx] - y)
+        m = nbr_left[n]
+        if m != -1:
+            edges_flat.append(m)
+            edges_cost.append(x - xs_list[m % nx])
+        m = nbr_right[n]
+        if m != -1:
+            edges_flat.append(m)
+            edges_cost.append(xs_list[m % nx] - x)
+        edges_offsets.append(len(edges_flat))
+
+    found = _a_star(
+        start_id,
+        goal_id,
+        xs_list,
+        ys_list,
+        edges_offsets,
+        edges_flat,
+        edges_cost,
+        start_vertical,
+        goal_vertical,
+    )
+    if found is None:
+        return None
+    came_from, state = found
+
+    # Walk back from the goal, keeping only the corners: a vertex is emitted
+    # where the arriving axis of a state differs from its predecessor's.
+    path = [goal]
+    while came_from[state] != -1:
+        prev = came_from[state]
+        if came_from[prev] != -1 and (prev & 1) != (state & 1):
+            n = prev >> 1
+            path.append((xs_list[n % nx], ys_list[n // nx]))
+        state = prev
+    if start != goal:
+        path.append(start)
+    path.reverse()
+    return path
 
 
 def _route_avoiding_tables(
     src_rect: Rect,
     dst_rect: Rect,
-    all_table_rects: dict[str, Rect],
+    ctx: RouteContext,
     src_id: str,
     dst_id: str,
-    pad: float = 8.0,
-    margin: float = 14.0,
+    search_spans: tuple[float | None, ...] = (4.0, 16.0, None),
 ) -> str:
     src_side, dst_side = _pick_sides(src_rect, dst_rect)
     start = _anchor(src_rect, src_side)
     goal = _anchor(dst_rect, dst_side)
 
-    # Expand obstacles slightly so we don't graze through boxes.
-    obstacles: list[Rect] = []
-    for tid, r in all_table_rects.items():
-        if tid in (src_id, dst_id):
+    keep = [k for k, tid in enumerate(ctx.ids) if tid not in (src_id, dst_id)]
+    obstacles = tuple([v[k] for k in keep] for v in ctx.obstacles)
+
+    # Fast path: the plain orthogonal route needs no search when it is clear.
+    points = _orthogonal_points(src_rect, dst_rect, margin=ctx.margin)
+    if all(_segment_clear(a, b, obstacles) for a, b in zip(points, points[1:])):
+        return _path_d(points)
+
+    endpoints = {src_id, dst_id}
+    lefts, rights, tops, bottoms = ctx.obstacles
+
+    # Search a grid built only from tables near the two endpoints first,
+    # widening the box (in multiples of margin) and finally using every
+    # table when the smaller grid has no route. The boxes are nested, so a
+    # span that selects no new table would only repeat the last search.
+    searched = -1
+    for span in search_spans:
+        if span is None:
+            selected = list(range(len(ctx.ids)))
+        else:
+            grow = span * ctx.margin
+            box_left = min(src_rect.left, dst_rect.left) - grow
+            box_right = max(src_rect.right, dst_rect.right) + grow
+            box_top = min(src_rect.top, dst_rect.top) - grow
+            box_bottom = max(src_rect.bottom, dst_rect.bottom) + grow
+            selected = [
+                k
+                for k in range(len(ctx.ids))
+                if lefts[k] <= box_right
+                and box_left <= rights[k]
+                and tops[k] <= box_bottom
+                and box_top <= bottoms[k]
+            ]
+        if len(selected) == searched:
             continue
-        obstacles.append(_expand(r, pad))
-
-    # Candidate grid lines: obstacle edges +/- margin plus endpoints.
-    xs: set[float] = {start[0], goal[0]}
-    ys: set[float] = {start[1], goal[1]}
-    for r in obstacles:
-        xs.update([r.left - margin, r.left, r.right, r.right + margin])
-        ys.update([r.top - margin, r.top, r.bottom, r.bottom + margin])
-
-    # Also include all table edges so we can route between columns/rows cleanly.
-    for r in all_table_rects.values():
-        xs.update([r.left, r.right])
-        ys.update([r.top, r.bottom])
-
-    xs_list = sorted(xs)
-    ys_list = sorted(ys)
-
-    def blocked(x: float, y: float) -> bool:
-        for r in obstacles:
-            if r.left < x < r.right and r.top < y < r.bottom:
-                return True
-        return False
-
-    nodes: list[tuple[float, float]] = []
-    for x in xs_list:
-        for y in ys_list:
-            if not blocked(x, y):
-                nodes.append((x, y))
-
-    node_set = set(nodes)
-    node_set.add(start)
-    node_set.add(goal)
+        searched = len(selected)
+
+        xs: set[int] = {start[0], goal[0]}
+        ys: set[int] = {start[1], goal[1]}
+        for k in selected:
+            xs.update(ctx.table_xs[k])
+            ys.update(ctx.table_ys[k])
+            if ctx.ids[k] not in endpoints:
+                xs.update(ctx.line_xs[k])
+                ys.update(ctx.line_ys[k])
+
+        path = _grid_route(
+            start,
+            goal,
+            sorted(xs),
+            sorted(ys),
+            obstacles,
+            start_vertical=src_side in ("top", "bottom"),
+            goal_vertical=dst_side in ("top", "bottom"),
+        )
+        if path:
+            return _path_d(path)
+        if len(selected) == len(ctx.ids):
+            break
 
-    # Build adjacency via nearest neighbors along x/y (visibility graph on grid).
-    edges: dict[tuple[float, float], list[tuple[float, float]]] = {n: [] for n in node_set}
-
-    by_x: dict[float, list[tuple[float, float]]] = {}
-    by_y: dict[float, list[tuple[float, float]]] = {}
-    for x, y in node_set:
-        by_x.setdefault(x, []).append((x, y))
-        by_y.setdefault(y, []).append((x, y))
-
-    for x, pts in by_x.items():
-        pts.sort(key=lambda p: p[1])
-        for a, b in zip(pts, pts[1:]):
-            if _segment_clear(a, b, obstacles):
-                edges[a].append(b)
-                edges[b].append(a)
-
-    for y, pts in by_y.items():
-        pts.sort(key=lambda p: p[0])
-        for a, b in zip(pts, pts[1:]):
-            if _segment_clear(a, b, obstacles):
-                edges[a].append(b)
-                edges[b].append(a)
-
-    path = _a_star(start, goal, nodes, edges)
-    if not path:
-        return _orthogonal_path(src_rect, dst_rect, margin=margin)
-
-    path = _compress_collinear(path)
-    d_parts: list[str] = [f"M{_round_svg(path[0][0])} {_round_svg(path[0][1])}"]
-    for x, y in path[1:]:
-        d_parts.append(f"L{_round_svg(x)} {_round_svg(y)}")
-    return " ".join(d_parts)
+    return _orthogonal_path(src_rect, dst_rect, margin=ctx.margin)
 
 
-def _load_yaml(path: pathlib.Path) -> dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+def _load_yaml(text: str) -> dict[str, Any]:
+    data = yaml.load(text, Loader=SafeLoader)
     if not isinstance(data, dict):
         raise ValueError("YAML root must be a mapping")
     return data
@@ -306,7 +564,7 @@ def _computed_table_rects(model: dict[str, Any]) -> dict[str, Rect]:
         tid = t.get("id")
         if not isinstance(tid, str):
             continue
-        rects[tid] = Rect(
+        rects[tid] = Rect.of(
             x=float(t["x"]),
             y=float(t["y"]),
             w=float(t["w"]),
@@ -345,44 +603,100 @@ def _relations(model: dict[str, Any]) -> list[tuple[str, str]]:
     return out
 
 
+# Below this many distinct routes, process start-up costs more than it saves.
+_PARALLEL_MIN_ROUTES = 32
+
+# Per-process routing state, installed once by _init_route_worker so the
+# rects and obstacle data are not pickled with every task.
+_worker_state: tuple[dict[str, Rect], RouteContext] | None = None
+
+
+def _init_route_worker(rects: dict[str, Rect], ctx: RouteContext) -> None:
+    global _worker_state
+    _worker_state = (rects, ctx)
+
+
+def _route_worker(pair: tuple[str, str]) -> str:
+    if _worker_state is None:
+        raise RuntimeError("route worker used without _init_route_worker")
+    rects, ctx = _worker_state
+    f, t = pair
+    return _route_avoiding_tables(rects[f], rects[t], ctx, f, t)
+
+
 def _render_paths_block(
     rels: list[tuple[str, str]],
     rects: dict[str, Rect],
     names: dict[str, str],
+    max_workers: int | None = None,
 ) -> str:
-    lines: list[str] = ["  paths:"]
     for f, t in rels:
-        src = rects.get(f)
-        dst = rects.get(t)
-        if src is None or dst is None:
+        if f not in rects or t not in rects:
             raise ValueError(f"missing computed.tables for relation: {f} -> {t}")
-        d = _route_avoiding_tables(src, dst, rects, f, t)
+
+    # Rects and obstacles are fixed for this block, so repeated relations
+    # between the same pair of tables share one route.
+    pairs = list(dict.fromkeys(rels))
+    ctx = _route_context(rects)
+    workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+    if len(pairs) < _PARALLEL_MIN_ROUTES or workers <= 1:
+        routes = [
+            _route_avoiding_tables(rects[f], rects[t], ctx, f, t) for f, t in pairs
+        ]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_route_worker,
+            initargs=(rects, ctx),
+        ) as pool:
+            chunksize = max(1, len(pairs) // (workers * 4))
+            routes = list(pool.map(_route_worker, pairs, chunksize=chunksize))
+    route_by_pair = dict(zip(pairs, routes))
+
+    lines: list[str] = ["  paths:"]
+    for f, t in rels:
         from_label = names.get(f, f)
         to_label = names.get(t, t)
         lines.append(f"    # {from_label} -> {to_label}")
-        lines.append(f"    - d: {d}")
+        lines.append(f"    - d: {route_by_pair[(f, t)]}")
     return "\n".join(lines) + "\n"
 
 
 def _replace_computed_paths_section(original: str, new_block: str) -> str:
-    pattern = re.compile(r"(?ms)^\s{2}paths:\n(?:^\s{4}.*\n)*")
-    match = pattern.search(original)
-    if not match:
-        raise ValueError("could not find '  paths:' section under computed")
-    return original[: match.start()] + new_block + original[match.end() :]
+    header = "  paths:\n"
+    if original.startswith(header):
+        start = 0
+    else:
+        start = original.find("\n" + header)
+        if start == -1:
+            raise ValueError("could not find '  paths:' section under computed")
+        start += 1
+
+    # Consume the indented entries; blank lines only count if more entries follow.
+    end = start + len(header)
+    pos = end
+    while pos < len(original):
+        nl = original.find("\n", pos)
+        line_end = len(original) if nl == -1 else nl + 1
+        line = original[pos:line_end]
+        if line.startswith("    "):
+            end = line_end
+        elif line.strip():
+            break
+        pos = line_end
+    return original[:start] + new_block + original[end:]
 
 
 def main() -> None:
     root = pathlib.Path(__file__).resolve().parents[1]
     yml_path = root / "データモデル.yml"
-    model = _load_yaml(yml_path)
+    original = yml_path.read_text(encoding="utf-8")
+    model = _load_yaml(original)
     rects = _computed_table_rects(model)
     names = _table_name_map(model)
     rels = _relations(model)
 
     new_paths_block = _render_paths_block(rels, rects, names)
-
-    original = yml_path.read_text(encoding="utf-8")
     updated = _replace_computed_paths_section(original, new_paths_block)
     if updated != original:
         yml_path.write_text(updated, encoding="utf-8")